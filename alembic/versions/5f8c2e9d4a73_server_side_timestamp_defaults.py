@@ -0,0 +1,46 @@
+"""server side timestamp defaults
+
+Revision ID: 5f8c2e9d4a73
+Revises: e27f0c4b8a16
+Create Date: 2026-10-15 10:37:52.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f8c2e9d4a73'
+down_revision: Union[str, Sequence[str], None] = 'e27f0c4b8a16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = (
+    ('users', 'created_at'),
+    ('users', 'updated_at'),
+    ('packages', 'created_at'),
+    ('packages', 'updated_at'),
+    ('purchases', 'purchased_at'),
+    ('credit_usage', 'used_at'),
+    ('admin_users', 'created_at'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column,
+                   existing_type=sa.DateTime(timezone=True),
+                   server_default=sa.func.now(),
+                   existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column,
+                   existing_type=sa.DateTime(timezone=True),
+                   server_default=None,
+                   existing_nullable=False)
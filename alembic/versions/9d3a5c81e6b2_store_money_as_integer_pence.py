@@ -0,0 +1,50 @@
+"""store money as integer pence
+
+Revision ID: 9d3a5c81e6b2
+Revises: 4b1e7d2a9f30
+Create Date: 2026-10-15 09:48:17.604213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3a5c81e6b2'
+down_revision: Union[str, Sequence[str], None] = '4b1e7d2a9f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('packages', 'price_gbp',
+               existing_type=sa.Numeric(precision=10, scale=2),
+               type_=sa.Integer(),
+               existing_nullable=False,
+               postgresql_using='round(price_gbp * 100)::integer')
+    op.alter_column('packages', 'price_gbp', new_column_name='price_pence')
+    op.alter_column('purchases', 'amount_gbp',
+               existing_type=sa.Numeric(precision=10, scale=2),
+               type_=sa.Integer(),
+               existing_nullable=False,
+               postgresql_using='round(amount_gbp * 100)::integer')
+    op.alter_column('purchases', 'amount_gbp', new_column_name='amount_pence')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('purchases', 'amount_pence', new_column_name='amount_gbp')
+    op.alter_column('purchases', 'amount_gbp',
+               existing_type=sa.Integer(),
+               type_=sa.Numeric(precision=10, scale=2),
+               existing_nullable=False,
+               postgresql_using='amount_gbp / 100.0')
+    op.alter_column('packages', 'price_pence', new_column_name='price_gbp')
+    op.alter_column('packages', 'price_gbp',
+               existing_type=sa.Integer(),
+               type_=sa.Numeric(precision=10, scale=2),
+               existing_nullable=False,
+               postgresql_using='price_gbp / 100.0')
@@ -0,0 +1,28 @@
+"""admin email lower index
+
+Revision ID: a81d6f3c5e94
+Revises: 5f8c2e9d4a73
+Create Date: 2026-10-15 10:58:09.447315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81d6f3c5e94'
+down_revision: Union[str, Sequence[str], None] = '5f8c2e9d4a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_admin_users_email_lower', 'admin_users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_admin_users_email_lower', table_name='admin_users')
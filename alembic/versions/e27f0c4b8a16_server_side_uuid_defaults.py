@@ -0,0 +1,40 @@
+"""server side uuid defaults
+
+Revision ID: e27f0c4b8a16
+Revises: 9d3a5c81e6b2
+Create Date: 2026-10-15 10:21:36.159840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e27f0c4b8a16'
+down_revision: Union[str, Sequence[str], None] = '9d3a5c81e6b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('users', 'packages', 'purchases', 'credit_usage', 'admin_users')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # gen_random_uuid() is built in from PostgreSQL 13; pgcrypto covers older servers
+    op.execute('CREATE EXTENSION IF NOT EXISTS pgcrypto')
+    for table in TABLES:
+        op.alter_column(table, 'id',
+                   existing_type=sa.UUID(),
+                   server_default=sa.text('gen_random_uuid()'),
+                   existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.alter_column(table, 'id',
+                   existing_type=sa.UUID(),
+                   server_default=None,
+                   existing_nullable=False)
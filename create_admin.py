@@ -1,9 +1,8 @@
 """Script to create an admin user and seed test packages."""
 
 import asyncio
-import uuid
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, select
 
 from database.models import AdminUser, Package
 from database.session import AsyncSessionLocal
@@ -17,22 +16,28 @@ async def create_admin_user(email: str, password: str):
         email: Admin email
         password: Plain text password (will be hashed)
     """
-    async with AsyncSessionLocal() as db:
-        # Check if admin already exists
-        from sqlalchemy import select
+    # Hash before opening a session so no pooled connection sits idle
+    # while bcrypt runs
+    password_hash = await hash_password(password)
 
-        result = await db.execute(select(AdminUser).where(AdminUser.email == email))
-        existing = result.scalar_one_or_none()
+    async with AsyncSessionLocal() as db:
+        # Check if admin already exists; matches the case-insensitive
+        # unique index used by login
+        result = await db.execute(
+            select(AdminUser.id)
+            .where(func.lower(AdminUser.email) == email.lower())
+            .limit(1)
+        )
+        exists = result.scalar() is not None
 
-        if existing:
+        if exists:
             print(f"❌ Admin user {email} already exists!")
             return
 
         # Create admin
         admin = AdminUser(
-            id=uuid.uuid4(),
             email=email,
-            password_hash=hash_password(password),
+            password_hash=password_hash,
         )
 
         db.add(admin)
@@ -56,7 +61,7 @@ async def seed_test_packages():
                 "description": "5 supporting statements",
                 "package_type": "one_time",
                 "credits": 5,
-                "price_gbp": 19.99,
+                "price_pence": 1999,
                 "stripe_price_id": "price_test_starter",
                 "display_order": 1,
             },
@@ -65,7 +70,7 @@ async def seed_test_packages():
                 "description": "15 supporting statements - Best Value!",
                 "package_type": "one_time",
                 "credits": 15,
-                "price_gbp": 49.99,
+                "price_pence": 4999,
                 "stripe_price_id": "price_test_professional",
                 "display_order": 2,
             },
@@ -74,25 +79,22 @@ async def seed_test_packages():
                 "description": "Unlimited statements for one month",
                 "package_type": "subscription",
                 "credits": None,  # Unlimited
-                "price_gbp": 29.99,
+                "price_pence": 2999,
                 "stripe_price_id": "price_test_unlimited",
                 "display_order": 3,
             },
         ]
 
-        for pkg_data in packages:
-            package = Package(
-                id=uuid.uuid4(),
-                is_active=True,
-                **pkg_data,
-            )
-            db.add(package)
-
+        # Single multi-row INSERT instead of one statement per package
+        await db.execute(
+            insert(Package),
+            [{"is_active": True, **pkg_data} for pkg_data in packages],
+        )
         await db.commit()
 
         print("\n✅ Test packages created:")
         for pkg in packages:
-            print(f"   - {pkg['name']}: £{pkg['price_gbp']}")
+            print(f"   - {pkg['name']}: £{pkg['price_pence'] / 100:.2f}")
         print(
             "\n⚠️  Note: These use placeholder Stripe Price IDs."
         )
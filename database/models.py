@@ -3,8 +3,9 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -18,19 +19,22 @@ class User(Base):
     """Email-based user accounts for credit tracking."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
     )
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     credits: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     is_unlimited: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     unlimited_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
     # Relationships
@@ -45,9 +49,17 @@ class Package(Base):
     """Configurable credit packages (one-time or subscription)."""
 
     __tablename__ = "packages"
+    __table_args__ = (
+        # Serves the public listing pre-sorted, skipping inactive rows
+        Index(
+            "ix_packages_active_display_order",
+            "display_order",
+            postgresql_where=text("is_active"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
     )
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
@@ -57,20 +69,29 @@ class Package(Base):
     credits: Mapped[int | None] = mapped_column(
         Integer, nullable=True
     )  # NULL means unlimited
-    price_gbp: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    price_pence: Mapped[int] = mapped_column(Integer, nullable=False)
     stripe_price_id: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     display_order: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
     # Relationships
     purchases: Mapped[list["Purchase"]] = relationship("Purchase", back_populates="package")
 
+    @hybrid_property
+    def price_gbp(self) -> float:
+        """Price in GBP, derived from the stored integer pence."""
+        return self.price_pence / 100
+
+    @price_gbp.setter
+    def price_gbp(self, value: float) -> None:
+        self.price_pence = round(value * 100)
+
     def __repr__(self) -> str:
         return f"<Package(id={self.id}, name={self.name}, type={self.package_type})>"
 
@@ -79,12 +100,18 @@ class Purchase(Base):
     """Transaction history for credit purchases."""
 
     __tablename__ = "purchases"
+    __table_args__ = (
+        # Also serves plain status lookups
+        Index("ix_purchases_status_purchased_at", "status", "purchased_at"),
+        # Per-user history, newest first; also covers plain user_id lookups
+        Index("ix_purchases_user_id_purchased_at", "user_id", "purchased_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
     )
     package_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("packages.id"), nullable=False
@@ -92,18 +119,27 @@ class Purchase(Base):
     stripe_session_id: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     stripe_subscription_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
     credits_purchased: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    amount_gbp: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    amount_pence: Mapped[int] = mapped_column(Integer, nullable=False)
     status: Mapped[str] = mapped_column(
         String(50), nullable=False
     )  # 'pending', 'completed', 'failed', 'refunded'
     purchased_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="purchases")
     package: Mapped["Package"] = relationship("Package", back_populates="purchases")
 
+    @hybrid_property
+    def amount_gbp(self) -> float:
+        """Amount paid in GBP, derived from the stored integer pence."""
+        return self.amount_pence / 100
+
+    @amount_gbp.setter
+    def amount_gbp(self, value: float) -> None:
+        self.amount_pence = round(value * 100)
+
     def __repr__(self) -> str:
         return f"<Purchase(id={self.id}, user_id={self.user_id}, status={self.status})>"
 
@@ -114,7 +150,7 @@ class CreditUsage(Base):
     __tablename__ = "credit_usage"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
@@ -122,9 +158,9 @@ class CreditUsage(Base):
     credits_used: Mapped[int] = mapped_column(Integer, nullable=False)
     role: Mapped[str] = mapped_column(String(255), nullable=False)
     trust: Mapped[str] = mapped_column(String(255), nullable=False)
-    submission_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    submission_id: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
     used_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
     )
 
     # Relationships
@@ -140,13 +176,17 @@ class AdminUser(Base):
     __tablename__ = "admin_users"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
     )
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
     def __repr__(self) -> str:
         return f"<AdminUser(id={self.id}, email={self.email})>"
+
+
+# Case-insensitive admin login lookups (see get_admin_by_email)
+Index("ix_admin_users_email_lower", func.lower(AdminUser.email), unique=True)
@@ -1,27 +1,64 @@
 """Async SQLAlchemy session management for PostgreSQL database."""
 
 from collections.abc import AsyncGenerator
+from functools import cache
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-
-from config import DATABASE_URL
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
-# Create async engine
-engine = create_async_engine(
+from config import (
     DATABASE_URL,
-    echo=False,  # Set to True for SQL query logging
-    future=True,
-    pool_pre_ping=True,  # Verify connections before using them
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_QUERY_CACHE_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
 )
 
-# Create async session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+
+@cache
+def get_engine() -> AsyncEngine:
+    """Create the async engine on first use and reuse it afterwards.
+
+    Deferring construction keeps imports cheap for scripts that never
+    touch the database.
+    """
+    return create_async_engine(
+        DATABASE_URL,
+        echo=False,  # Set to True for SQL query logging
+        future=True,
+        pool_pre_ping=True,  # Verify connections before using them
+        pool_size=DB_POOL_SIZE,  # Steady-state connections kept open
+        max_overflow=DB_MAX_OVERFLOW,  # Extra connections allowed under burst load
+        pool_timeout=DB_POOL_TIMEOUT,  # Seconds to wait for a free connection
+        pool_recycle=DB_POOL_RECYCLE,  # Recycle connections before the server drops them
+        query_cache_size=DB_QUERY_CACHE_SIZE,  # Compiled SQL strings kept per engine
+        connect_args={
+            # asyncpg's own cache plus SQLAlchemy's prepared statement cache
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+@cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Create the async session factory on first use."""
+    return async_sessionmaker(
+        get_engine(),
+        expire_on_commit=False,  # No reload SELECTs for objects used after commit
+        autoflush=False,
+    )
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Open a new session from the lazily created session factory."""
+    return get_sessionmaker()()
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -31,13 +68,9 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         @app.get("/example")
         async def example_route(db: AsyncSession = Depends(get_db)):
             ...
+
+    Writes are committed explicitly by the service layer; closing the
+    session rolls back anything left uncommitted.
     """
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+        yield session
@@ -1,12 +1,20 @@
 """FastAPI application for NHS Supporting Information Generator with credit-based payments."""
 
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 
-from config import FRONTEND_URL
+from config import FRONTEND_URL, SUBMISSION_DRAIN_TIMEOUT_SECONDS, SUBMISSION_WORKERS
+from database.session import AsyncSessionLocal, get_engine
 from routers import admin, packages, stripe_webhook, webhook
+from services import claude_service, stripe_service
+from services.cache import close_cache
+from services.email_service import wait_for_pending_sends
+from services.http_client import close_http_client, get_http_client
+from services.pdf_extractor import remove_download_cache, shutdown_pdf_pool
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,24 +22,79 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="NHS Supporting Information Generator")
+
+# =============================================================================
+# Application Lifespan
+# =============================================================================
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build shared resources once at startup and release them on shutdown.
+
+    Warms the database pool, package listing cache and HTTP client so the
+    first real request doesn't pay connection setup or a cold query, and
+    runs the submission worker pool.
+    """
+    engine = get_engine()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.warning("Database warm-up failed: %s", e)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await packages.refresh_packages_cache(db)
+    except Exception as e:
+        logger.warning("Package cache warm-up failed: %s", e)
+
+    app.state.http = get_http_client()
+    app.state.submission_workers = webhook.start_submission_workers(SUBMISSION_WORKERS)
+
+    yield
+
+    await webhook.stop_submission_workers(
+        app.state.submission_workers, SUBMISSION_DRAIN_TIMEOUT_SECONDS
+    )
+    await wait_for_pending_sends()
+    await close_http_client()
+    shutdown_pdf_pool()
+    remove_download_cache()
+    await claude_service.client.close()
+    await stripe_service.close_stripe_client()
+    await close_cache()
+    await engine.dispose()
+
+
+app = FastAPI(
+    title="NHS Supporting Information Generator",
+    lifespan=lifespan,
+)
 
 # =============================================================================
 # CORS Configuration
 # =============================================================================
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
+# Built once at import; a frozenset drops FRONTEND_URL if it duplicates a
+# hard-coded origin and gives O(1) membership checks per request.
+ALLOWED_ORIGINS = frozenset(
+    {
         FRONTEND_URL,
         "http://localhost:3000",  # Development
-        "http://localhost:3001",
+        "http://localhost:3001",  # Alternative dev port
         "https://nhs-payment-frontend.vercel.app",
-        "https://applysmartuk.uk" # Alternative dev port
-    ],
+        "https://applysmartuk.uk",
+    }
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # =============================================================================
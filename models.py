@@ -1,6 +1,6 @@
 from typing import Any
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class TallyField(BaseModel):
@@ -25,9 +25,14 @@ class TallyFormData(BaseModel):
 class TallyWebhookPayload(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
+    eventId: str | None = None
     data: TallyFormData
 
 
+# Built once so the webhook can validate raw request bytes directly
+TALLY_ADAPTER = TypeAdapter(TallyWebhookPayload)
+
+
 class ParsedFormData(BaseModel):
     name: str
     role: str
@@ -38,3 +43,5 @@ class ParsedFormData(BaseModel):
     cv_filename: str
     person_spec_url: str
     person_spec_mimetype: str
+    submission_id: str = ""
+    credits_reserved: int = 0
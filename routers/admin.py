@@ -1,15 +1,19 @@
 """Admin API endpoints with JWT authentication."""
 
+import base64
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.session import get_db
-from services import auth_service, database_service, stripe_service
+from database.session import AsyncSessionLocal, get_db
+from services import auth_service, cache, database_service, stripe_service
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 security = HTTPBearer()
@@ -42,16 +46,15 @@ class LoginResponse(BaseModel):
 class UserResponse(BaseModel):
     """User information for admin view."""
 
-    id: str
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
     email: str
     credits: int
     is_unlimited: bool
     unlimited_expires_at: datetime | None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class AddCreditsRequest(BaseModel):
     """Request to manually add credits."""
@@ -78,7 +81,9 @@ class PurchaseResponse(BaseModel):
 class PackageResponse(BaseModel):
     """Package information for admin view."""
 
-    id: str
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
     name: str
     description: str
     package_type: str
@@ -89,9 +94,6 @@ class PackageResponse(BaseModel):
     display_order: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class PackageCreateRequest(BaseModel):
     """Request to create a new package."""
@@ -183,8 +185,11 @@ async def admin_login(request: LoginRequest, db: AsyncSession = Depends(get_db))
             detail="Incorrect email or password",
         )
 
+    # Release the pooled connection before the CPU-bound bcrypt check
+    await db.close()
+
     # Verify password
-    if not auth_service.verify_password(request.password, admin.password_hash):
+    if not await auth_service.verify_password(request.password, admin.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -201,35 +206,67 @@ async def admin_login(request: LoginRequest, db: AsyncSession = Depends(get_db))
 # =============================================================================
 
 
+def _encode_user_cursor(user) -> str:
+    """Encode a user's (created_at, id) sort key as an opaque page cursor."""
+    raw = f"{user.created_at.isoformat()}|{user.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_user_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Decode a page cursor back into its (created_at, id) sort key."""
+    try:
+        created_at, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(user_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/users", response_model=list[UserResponse])
 async def list_users(
-    offset: int = 0,
-    limit: int = 100,
+    response: Response,
+    after: str | None = None,
+    limit: int = Query(100, ge=1, le=500),
     admin_email: str = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all users with pagination.
+    """List all users, newest first, with keyset pagination.
 
-    Requires admin authentication.
+    Pass the ``X-Next-Cursor`` header from a full page as ``after`` to fetch
+    the next page. Requires admin authentication.
     """
-    users = await database_service.get_all_users(db, offset=offset, limit=limit)
+    users = await database_service.get_all_users(
+        db,
+        after=_decode_user_cursor(after) if after else None,
+        limit=limit,
+    )
 
-    return [
-        UserResponse(
-            id=str(user.id),
-            email=user.email,
-            credits=user.credits,
-            is_unlimited=user.is_unlimited,
-            unlimited_expires_at=user.unlimited_expires_at,
-            created_at=user.created_at,
-        )
-        for user in users
-    ]
+    if users and len(users) == limit:
+        response.headers["X-Next-Cursor"] = _encode_user_cursor(users[-1])
+
+    return [UserResponse.model_validate(user) for user in users]
+
+
+async def _user_ndjson_lines() -> AsyncIterator[bytes]:
+    """Serialise every user as one JSON line while rows stream in."""
+    # Own session: the request's session may be closed before streaming ends
+    async with AsyncSessionLocal() as db:
+        async for user in database_service.stream_all_users(db):
+            yield orjson.dumps(UserResponse.model_validate(user).model_dump()) + b"\n"
+
+
+@router.get("/users.ndjson")
+async def export_users(admin_email: str = Depends(get_current_admin)):
+    """Export all users as newline-delimited JSON, newest first.
+
+    Rows are streamed from a server-side cursor, so memory use stays flat
+    regardless of table size. Requires admin authentication.
+    """
+    return StreamingResponse(_user_ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(
-    user_id: str,
+    user_id: uuid.UUID,
     admin_email: str = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
 ):
@@ -237,29 +274,17 @@ async def get_user(
 
     Requires admin authentication.
     """
-    try:
-        user_uuid = uuid.UUID(user_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid user ID format")
-
-    user = await database_service.get_user_by_id(db, user_uuid)
+    user = await database_service.get_user_by_id(db, user_id)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return UserResponse(
-        id=str(user.id),
-        email=user.email,
-        credits=user.credits,
-        is_unlimited=user.is_unlimited,
-        unlimited_expires_at=user.unlimited_expires_at,
-        created_at=user.created_at,
-    )
+    return UserResponse.model_validate(user)
 
 
 @router.get("/users/{user_id}/purchases", response_model=list[PurchaseResponse])
 async def get_user_purchases(
-    user_id: str,
+    user_id: uuid.UUID,
     admin_email: str = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
 ):
@@ -267,34 +292,25 @@ async def get_user_purchases(
 
     Requires admin authentication.
     """
-    try:
-        user_uuid = uuid.UUID(user_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid user ID format")
-
-    purchases = await database_service.get_user_purchases(db, user_uuid)
-
-    # Get package names for each purchase
-    result = []
-    for purchase in purchases:
-        package = await database_service.get_package_by_id(db, purchase.package_id)
-        result.append(
-            PurchaseResponse(
-                id=str(purchase.id),
-                package_name=package.name if package else "Unknown",
-                credits_purchased=purchase.credits_purchased,
-                amount_gbp=float(purchase.amount_gbp),
-                status=purchase.status,
-                purchased_at=purchase.purchased_at,
-            )
-        )
+    purchases = await database_service.get_user_purchases(db, user_id)
 
-    return result
+    # Packages are eager-loaded with the purchases, so no per-row lookups
+    return [
+        PurchaseResponse(
+            id=str(purchase.id),
+            package_name=purchase.package.name if purchase.package else "Unknown",
+            credits_purchased=purchase.credits_purchased,
+            amount_gbp=purchase.amount_gbp,
+            status=purchase.status,
+            purchased_at=purchase.purchased_at,
+        )
+        for purchase in purchases
+    ]
 
 
 @router.post("/users/{user_id}/credits")
 async def add_user_credits(
-    user_id: str,
+    user_id: uuid.UUID,
     request: AddCreditsRequest,
     admin_email: str = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
@@ -303,16 +319,11 @@ async def add_user_credits(
 
     Requires admin authentication.
     """
-    try:
-        user_uuid = uuid.UUID(user_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid user ID format")
-
     if request.credits <= 0:
         raise HTTPException(status_code=400, detail="Credits must be positive")
 
     try:
-        await database_service.add_credits(db, user_uuid, request.credits)
+        await database_service.add_credits(db, user_id, request.credits)
         return {"status": "success", "message": f"Added {request.credits} credits"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -334,21 +345,7 @@ async def list_all_packages(
     """
     packages = await database_service.get_all_packages(db)
 
-    return [
-        PackageResponse(
-            id=str(pkg.id),
-            name=pkg.name,
-            description=pkg.description,
-            package_type=pkg.package_type,
-            credits=pkg.credits,
-            price_gbp=float(pkg.price_gbp),
-            stripe_price_id=pkg.stripe_price_id,
-            is_active=pkg.is_active,
-            display_order=pkg.display_order,
-            created_at=pkg.created_at,
-        )
-        for pkg in packages
-    ]
+    return [PackageResponse.model_validate(pkg) for pkg in packages]
 
 
 @router.post("/packages", response_model=PackageResponse)
@@ -365,7 +362,7 @@ async def create_package(
     # Create Stripe product/price if requested
     if request.create_stripe_product:
         try:
-            stripe_price_id = stripe_service.create_stripe_product_and_price(
+            stripe_price_id = await stripe_service.create_stripe_product_and_price(
                 package_name=request.name,
                 package_description=request.description,
                 price_gbp=request.price_gbp,
@@ -390,24 +387,14 @@ async def create_package(
         credits=request.credits,
         display_order=request.display_order,
     )
+    await cache.cache_delete(cache.ACTIVE_PACKAGES_KEY)
 
-    return PackageResponse(
-        id=str(package.id),
-        name=package.name,
-        description=package.description,
-        package_type=package.package_type,
-        credits=package.credits,
-        price_gbp=float(package.price_gbp),
-        stripe_price_id=package.stripe_price_id,
-        is_active=package.is_active,
-        display_order=package.display_order,
-        created_at=package.created_at,
-    )
+    return PackageResponse.model_validate(package)
 
 
 @router.put("/packages/{package_id}", response_model=PackageResponse)
 async def update_package(
-    package_id: str,
+    package_id: uuid.UUID,
     request: PackageUpdateRequest,
     admin_email: str = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
@@ -416,39 +403,25 @@ async def update_package(
 
     Requires admin authentication.
     """
-    try:
-        package_uuid = uuid.UUID(package_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid package ID format")
-
-    # Build update dict from non-None fields
-    update_data = {k: v for k, v in request.dict().items() if v is not None}
+    # Only consider fields the client actually sent
+    update_data = {
+        k: v for k, v in request.model_dump(exclude_unset=True).items() if v is not None
+    }
 
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    package = await database_service.update_package(db, package_uuid, **update_data)
+    package = await database_service.update_package(db, package_id, **update_data)
 
     if not package:
         raise HTTPException(status_code=404, detail="Package not found")
 
-    return PackageResponse(
-        id=str(package.id),
-        name=package.name,
-        description=package.description,
-        package_type=package.package_type,
-        credits=package.credits,
-        price_gbp=float(package.price_gbp),
-        stripe_price_id=package.stripe_price_id,
-        is_active=package.is_active,
-        display_order=package.display_order,
-        created_at=package.created_at,
-    )
+    return PackageResponse.model_validate(package)
 
 
 @router.delete("/packages/{package_id}")
 async def delete_package(
-    package_id: str,
+    package_id: uuid.UUID,
     admin_email: str = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
 ):
@@ -456,12 +429,7 @@ async def delete_package(
 
     Requires admin authentication.
     """
-    try:
-        package_uuid = uuid.UUID(package_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid package ID format")
-
-    success = await database_service.deactivate_package(db, package_uuid)
+    success = await database_service.deactivate_package(db, package_id)
 
     if not success:
         raise HTTPException(status_code=404, detail="Package not found")
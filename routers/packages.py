@@ -2,12 +2,14 @@
 
 import uuid
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, EmailStr
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.session import get_db
-from services import database_service, stripe_service
+from services import cache, database_service, stripe_service
 
 router = APIRouter(prefix="/api", tags=["packages"])
 
@@ -15,7 +17,9 @@ router = APIRouter(prefix="/api", tags=["packages"])
 class PackageResponse(BaseModel):
     """Package information for frontend display."""
 
-    id: str
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
     name: str
     description: str
     package_type: str
@@ -23,15 +27,12 @@ class PackageResponse(BaseModel):
     price_gbp: float
     display_order: int
 
-    class Config:
-        from_attributes = True
-
 
 class CheckoutRequest(BaseModel):
     """Request to create a checkout session."""
 
     email: EmailStr
-    package_id: str
+    package_id: uuid.UUID
 
 
 class CheckoutResponse(BaseModel):
@@ -44,22 +45,30 @@ class CheckoutResponse(BaseModel):
 async def list_packages(db: AsyncSession = Depends(get_db)):
     """Get all active packages for display on the frontend.
 
-    Returns packages ordered by display_order.
+    Returns packages ordered by display_order. The serialized list is cached
+    in Redis and invalidated by the admin package endpoints.
+    """
+    cached = await cache.cache_get(cache.ACTIVE_PACKAGES_KEY)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    return await refresh_packages_cache(db)
+
+
+async def refresh_packages_cache(db: AsyncSession) -> list[PackageResponse]:
+    """Load the active packages and store the serialized listing in Redis.
+
+    Also called at startup so the first request to each worker is a hit.
     """
     packages = await database_service.get_active_packages(db)
 
-    return [
-        PackageResponse(
-            id=str(pkg.id),
-            name=pkg.name,
-            description=pkg.description,
-            package_type=pkg.package_type,
-            credits=pkg.credits,
-            price_gbp=float(pkg.price_gbp),
-            display_order=pkg.display_order,
-        )
-        for pkg in packages
-    ]
+    response = [PackageResponse.model_validate(pkg) for pkg in packages]
+    await cache.cache_set(
+        cache.ACTIVE_PACKAGES_KEY,
+        orjson.dumps([pkg.model_dump() for pkg in response]),
+        cache.ACTIVE_PACKAGES_TTL_SECONDS,
+    )
+    return response
 
 
 @router.post("/checkout", response_model=CheckoutResponse)
@@ -74,16 +83,11 @@ async def create_checkout(
     Returns:
         Stripe Checkout URL to redirect user to
     """
-    try:
-        package_id = uuid.UUID(request.package_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid package ID format")
-
     try:
         checkout_url = await stripe_service.create_checkout_session(
             db=db,
             email=request.email,
-            package_id=package_id,
+            package_id=request.package_id,
         )
 
         return CheckoutResponse(checkout_url=checkout_url)
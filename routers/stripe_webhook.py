@@ -1,25 +1,56 @@
 """Stripe webhook endpoint for payment events."""
 
 import logging
+from collections.abc import Awaitable, Callable
 
 import stripe
-from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi import APIRouter, Header, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import STRIPE_WEBHOOK_SECRET
-from database.session import get_db
+from database.session import AsyncSessionLocal
 from services import stripe_service
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+EVENT_HANDLERS: dict[str, Callable[[AsyncSession, dict], Awaitable[None]]] = {
+    "checkout.session.completed": stripe_service.handle_checkout_completed,
+    "customer.subscription.created": stripe_service.handle_subscription_created,
+    "customer.subscription.deleted": stripe_service.handle_subscription_deleted,
+}
+
+
+async def read_verified_event(request: Request, stripe_signature: str) -> dict:
+    """Read the request body and return the event once its signature checks out.
+
+    Returns:
+        The event as a plain dict, since the handlers use dict access
+
+    Raises:
+        HTTPException: If the payload or signature is invalid
+    """
+    payload = await request.body()
+
+    try:
+        event = stripe.Webhook.construct_event(
+            payload, stripe_signature, STRIPE_WEBHOOK_SECRET
+        )
+    except ValueError as e:
+        logger.error(f"Invalid payload: {e}")
+        raise HTTPException(status_code=400, detail="Invalid payload")
+    except stripe.error.SignatureVerificationError as e:
+        logger.error(f"Invalid signature: {e}")
+        raise HTTPException(status_code=400, detail="Invalid signature")
+
+    return event.to_dict()
+
 
 @router.post("/stripe-webhook")
 async def stripe_webhook(
     request: Request,
     stripe_signature: str = Header(None, alias="Stripe-Signature"),
-    db: AsyncSession = Depends(get_db),
 ):
     """Handle Stripe webhook events.
 
@@ -27,48 +58,30 @@ async def stripe_webhook(
     - checkout.session.completed: Add credits after payment
     - customer.subscription.created: Activate unlimited subscription
     - customer.subscription.deleted: Deactivate unlimited subscription
+
+    The event is handled before responding so a failure returns 500 and
+    Stripe redelivers it; the handlers are idempotent, and confirmation
+    emails are sent in the background so the response stays quick.
     """
     if not stripe_signature:
         logger.error("Missing Stripe-Signature header")
         raise HTTPException(status_code=400, detail="Missing signature")
 
-    # Get raw body for signature verification
-    payload = await request.body()
-
-    try:
-        # Verify webhook signature
-        event = stripe.Webhook.construct_event(
-            payload, stripe_signature, STRIPE_WEBHOOK_SECRET
-        )
-    except ValueError as e:
-        logger.error(f"Invalid payload: {e}")
-        raise HTTPException(status_code=400, detail="Invalid payload")
-    except stripe.error.SignatureVerificationError as e:
-        logger.error(f"Invalid signature: {e}")
-        raise HTTPException(status_code=400, detail="Invalid signature")
+    event = await read_verified_event(request, stripe_signature)
 
     event_type = event["type"]
     logger.info(f"Received Stripe webhook: {event_type}")
 
-    # Handle different event types
-    try:
-        if event_type == "checkout.session.completed":
-            session = event["data"]["object"]
-            await stripe_service.handle_checkout_completed(db, session)
+    handler = EVENT_HANDLERS.get(event_type)
+    if handler is None:
+        logger.info(f"Unhandled event type: {event_type}")
+        return {"status": "success"}
 
-        elif event_type == "customer.subscription.created":
-            subscription = event["data"]["object"]
-            await stripe_service.handle_subscription_created(db, subscription)
-
-        elif event_type == "customer.subscription.deleted":
-            subscription = event["data"]["object"]
-            await stripe_service.handle_subscription_deleted(db, subscription)
-
-        else:
-            logger.info(f"Unhandled event type: {event_type}")
-
-    except Exception as e:
-        logger.error(f"Error processing webhook {event_type}: {e}")
+    try:
+        async with AsyncSessionLocal() as db:
+            await handler(db, event["data"]["object"])
+    except Exception:
+        logger.exception("Error processing webhook %s", event_type)
         raise HTTPException(status_code=500, detail="Webhook processing failed")
 
     return {"status": "success"}
@@ -1,27 +1,39 @@
 """Tally webhook endpoint with credit checking."""
 
+import asyncio
 import logging
 import uuid
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config import FRONTEND_URL
-from database.session import get_db
-from models import ParsedFormData, TallyWebhookPayload
+from config import FRONTEND_URL, SUBMISSION_QUEUE_SIZE
+from database.session import AsyncSessionLocal, get_db
+from models import TALLY_ADAPTER, ParsedFormData
 from services import database_service
-from services.claude_service import generate_supporting_info
+from services.claude_service import generate_supporting_info_stream
 from services.email_service import send_email, send_insufficient_credits_email
-from services.tally_parser import extract_fields
+from services.tally_parser import extract_consent, extract_fields
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Namespace for deriving deterministic submission IDs from Tally event IDs
+SUBMISSION_NAMESPACE = uuid.UUID("9dee9204-64aa-4a17-99de-e58da916a7d2")
+
+# Bounded so a burst of submissions can't fan out into unlimited concurrent
+# Claude calls; drained by a fixed pool of workers started with the app.
+submission_queue: asyncio.Queue[ParsedFormData] = asyncio.Queue(
+    maxsize=SUBMISSION_QUEUE_SIZE
+)
+
 
 @router.post("/webhook")
 async def tally_webhook(
-    payload: TallyWebhookPayload,
+    request: Request,
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
@@ -30,8 +42,21 @@ async def tally_webhook(
     Returns 200 immediately so Render's free-tier request timeout doesn't kill
     the connection while Claude is still generating the statement.
     """
+    # Validate the raw body in one pass with the prebuilt adapter
+    try:
+        payload = TALLY_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
     logger.info("Received submission for form: %s", payload.data.formName)
 
+    # Reject non-consenting submissions before doing the full field extraction
+    if not extract_consent(payload):
+        logger.warning(
+            "Submission rejected — no consent (form: %s)", payload.data.formName
+        )
+        raise HTTPException(status_code=400, detail="Consent was not provided.")
+
     # Parse and validate synchronously — fast, no external calls
     try:
         form_data = extract_fields(payload)
@@ -43,20 +68,31 @@ async def tally_webhook(
 
     logger.info("Submission received for: %s (%s)", form_data.name, form_data.email)
 
-    if not form_data.consent:
-        logger.warning("Submission rejected — no consent: %s", form_data.email)
-        raise HTTPException(status_code=400, detail="Consent was not provided.")
-
-    # Check if user has credits
-    has_credits, available_credits = await database_service.check_user_credits(
-        db, form_data.email
-    )
+    # Derive a stable ID so Tally redeliveries of the same event are detected
+    if payload.eventId:
+        form_data.submission_id = str(
+            uuid.uuid5(SUBMISSION_NAMESPACE, f"{form_data.email}|{payload.eventId}")
+        )
+    else:
+        form_data.submission_id = str(uuid.uuid4())
 
-    if not has_credits:
+    # Reserve the credit up front in one atomic statement so a double
+    # submission can't get two Claude runs for one credit
+    try:
+        form_data.credits_reserved = await database_service.reserve_credit(
+            db,
+            form_data.email,
+            role=form_data.role,
+            trust=form_data.trust,
+            submission_id=form_data.submission_id,
+        )
+    except database_service.DuplicateSubmissionError:
+        logger.info("Duplicate submission ignored: %s", form_data.submission_id)
+        return {"status": "duplicate", "message": "Submission already processed."}
+    except database_service.InsufficientCreditsError:
         logger.info(
-            "User %s has insufficient credits (%d). Sending purchase email.",
+            "User %s has insufficient credits. Sending purchase email.",
             form_data.email,
-            available_credits,
         )
 
         # Send email with checkout link
@@ -72,15 +108,24 @@ async def tally_webhook(
             "message": "You need to purchase credits first. Check your email for a link.",
         }
 
-    # User has credits - process the submission
+    # Credit reserved - process the submission
     logger.info(
-        "User %s has credits (%s). Processing submission.",
+        "Reserved %d credit(s) for %s. Processing submission.",
+        form_data.credits_reserved,
         form_data.email,
-        "unlimited" if available_credits == -1 else available_credits,
     )
 
-    # Heavy work (downloads + Claude + email) runs after this response is sent
-    background_tasks.add_task(process_submission_with_credit_deduction, form_data, db)
+    # Heavy work (downloads + Claude + email) is picked up by a queue worker
+    try:
+        submission_queue.put_nowait(form_data)
+    except asyncio.QueueFull:
+        logger.error("Submission queue full, rejecting %s", form_data.email)
+        await database_service.refund_credit(
+            db, form_data.submission_id, form_data.credits_reserved
+        )
+        raise HTTPException(
+            status_code=503, detail="Too many submissions in progress. Please retry."
+        )
 
     return {
         "status": "accepted",
@@ -88,74 +133,131 @@ async def tally_webhook(
     }
 
 
+async def refund_reserved_credit(form_data: ParsedFormData) -> None:
+    """Return a submission's reserved credit on a fresh session.
+
+    Used when the work is abandoned (shutdown or cancellation), so failures
+    are logged rather than raised.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await database_service.refund_credit(
+                db, form_data.submission_id, form_data.credits_reserved
+            )
+        logger.info("Refunded credit to %s", form_data.email)
+    except Exception:
+        logger.exception("Failed to refund credit to %s", form_data.email)
+
+
+async def submission_worker() -> None:
+    """Process queued submissions one at a time until cancelled."""
+    while True:
+        form_data = await submission_queue.get()
+        try:
+            async with AsyncSessionLocal() as db:
+                await process_submission_with_credit_deduction(form_data, db)
+        except asyncio.CancelledError:
+            # Cancelled mid-submission: Tally won't redeliver, so give the
+            # credit back before letting the cancellation through
+            await refund_reserved_credit(form_data)
+            raise
+        except Exception:
+            logger.exception(
+                "Background: unhandled error processing %s", form_data.email
+            )
+        finally:
+            submission_queue.task_done()
+
+
+def start_submission_workers(count: int) -> list[asyncio.Task]:
+    """Spawn the worker pool that drains the submission queue."""
+    return [
+        asyncio.create_task(submission_worker(), name=f"submission-worker-{i}")
+        for i in range(count)
+    ]
+
+
+async def stop_submission_workers(
+    workers: list[asyncio.Task], drain_timeout: float
+) -> None:
+    """Drain the queue, then cancel the worker pool and wait for it to exit.
+
+    Submissions still queued once the timeout expires are refunded, since
+    their credit was reserved and Tally has already been answered.
+    """
+    try:
+        await asyncio.wait_for(submission_queue.join(), drain_timeout)
+    except TimeoutError:
+        logger.warning(
+            "Submission queue not drained after %gs; refunding the rest",
+            drain_timeout,
+        )
+
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+    while not submission_queue.empty():
+        form_data = submission_queue.get_nowait()
+        await refund_reserved_credit(form_data)
+        submission_queue.task_done()
+
+
 async def process_submission_with_credit_deduction(
     form_data: ParsedFormData, db: AsyncSession
 ):
-    """Download files, call Claude, email the result, and deduct credit.
+    """Download files, call Claude, and email the result.
 
-    Runs as a background task.
+    The credit was already reserved by the webhook; it is refunded if
+    generation fails. Runs on a submission worker with its own database
+    session.
     """
     logger.info(
         "Background: generating Supporting Information for %s...", form_data.name
     )
 
-    # Get user to deduct credit later
-    user = await database_service.get_user_by_email(db, form_data.email)
-    if not user:
-        logger.error("Background: User %s not found", form_data.email)
-        return
-
+    # Collect streamed chunks straight into the email body parts instead of
+    # materialising the statement as its own string first
+    email_parts = [
+        f"Dear {form_data.name},\n\n"
+        f"Thank you for using the NHS Supporting Information Generator. "
+        f"Below is your tailored statement for your application as "
+        f"**{form_data.role}** at **{form_data.trust}**.\n\n"
+        f"---\n\n"
+    ]
     try:
-        supporting_info = await generate_supporting_info(
+        async for chunk in generate_supporting_info_stream(
             name=form_data.name,
             role=form_data.role,
             trust=form_data.trust,
             cv_url=form_data.cv_url,
             person_spec_url=form_data.person_spec_url,
             person_spec_mimetype=form_data.person_spec_mimetype,
-        )
+        ):
+            email_parts.append(chunk)
     except Exception as e:
         logger.error(
             "Background: Claude generation failed for %s: %s", form_data.email, e
         )
+        await database_service.refund_credit(
+            db, form_data.submission_id, form_data.credits_reserved
+        )
+        logger.info("Background: refunded credit to %s", form_data.email)
         return
 
     logger.info("Background: Supporting Information generated for %s.", form_data.name)
 
-    # Deduct credit after successful generation
-    try:
-        await database_service.deduct_credit(db, user.id, credits=1)
-        logger.info("Background: Deducted 1 credit from user %s", form_data.email)
-
-        # Log usage for audit
-        await database_service.log_credit_usage(
-            db=db,
-            user_id=user.id,
-            credits_used=1,
-            role=form_data.role,
-            trust=form_data.trust,
-            submission_id=str(uuid.uuid4()),  # Generate unique submission ID
-        )
-    except ValueError as e:
-        logger.error("Background: Failed to deduct credit: %s", e)
-        # Continue to send email even if credit deduction fails
-        # (shouldn't happen since we checked credits earlier)
-
     # Send email with result
     subject = f"Your Supporting Information — {form_data.role} at {form_data.trust}"
-    email_body = (
-        f"Dear {form_data.name},\n\n"
-        f"Thank you for using the NHS Supporting Information Generator. "
-        f"Below is your tailored statement for your application as "
-        f"**{form_data.role}** at **{form_data.trust}**.\n\n"
-        f"---\n\n"
-        f"{supporting_info}\n\n"
-        f"---\n\n"
-        f"Please review and customise the statement as needed before "
-        f"including it in your application.\n\n"
-        f"Best of luck!\n\n"
-        f"The NHS Supporting Information Generator"
+    email_parts.append(
+        "\n\n"
+        "---\n\n"
+        "Please review and customise the statement as needed before "
+        "including it in your application.\n\n"
+        "Best of luck!\n\n"
+        "The NHS Supporting Information Generator"
     )
+    email_body = "".join(email_parts)
 
     try:
         await send_email(
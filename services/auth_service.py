@@ -1,16 +1,31 @@
 """Authentication service for admin JWT tokens and password hashing."""
 
-from datetime import datetime, timedelta
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 
 import bcrypt
 from jose import JWTError, jwt
 
 from config import JWT_ALGORITHM, JWT_EXPIRE_MINUTES, JWT_SECRET_KEY
 
+# bcrypt work factor, pinned so hashing cost doesn't drift with library defaults
+BCRYPT_ROUNDS = 12
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# Verified tokens are remembered briefly so repeated dashboard requests with
+# the same token skip the HMAC check and JSON decode.
+TOKEN_CACHE_MAX_SIZE = 1024
+TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password.
 
+    bcrypt is deliberately slow, so the check runs in a worker thread to
+    keep the event loop free.
+
     Args:
         plain_password: Plain text password
         hashed_password: Bcrypt hashed password
@@ -18,11 +33,15 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return await asyncio.to_thread(
+        bcrypt.checkpw,
+        plain_password.encode('utf-8'),
+        hashed_password.encode('utf-8'),
+    )
 
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt.
+async def hash_password(password: str) -> str:
+    """Hash a password using bcrypt in a worker thread.
 
     Args:
         password: Plain text password
@@ -30,8 +49,8 @@ def hash_password(password: str) -> str:
     Returns:
         Bcrypt hashed password as string
     """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = await asyncio.to_thread(bcrypt.hashpw, password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
@@ -45,15 +64,13 @@ def create_access_token(email: str, expires_delta: timedelta | None = None) -> s
     Returns:
         Encoded JWT token string
     """
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=JWT_EXPIRE_MINUTES)
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=JWT_EXPIRE_MINUTES))
 
     to_encode = {
         "sub": email,
         "exp": expire,
-        "iat": datetime.utcnow(),
+        "iat": now,
     }
 
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
@@ -69,11 +86,28 @@ def verify_token(token: str) -> str | None:
     Returns:
         Admin email if token is valid, None otherwise
     """
+    now = time.time()
+    cached = _token_cache.get(token)
+    if cached is not None:
+        cached_until, email = cached
+        if cached_until > now:
+            _token_cache.move_to_end(token)
+            return email
+        del _token_cache[token]
+
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             return None
-        return email
     except JWTError:
         return None
+
+    # Never cache past the token's own expiry
+    exp = payload.get("exp")
+    ttl = TOKEN_CACHE_TTL_SECONDS if exp is None else min(TOKEN_CACHE_TTL_SECONDS, exp - now)
+    if ttl > 0:
+        _token_cache[token] = (now + ttl, email)
+        if len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+            _token_cache.popitem(last=False)
+    return email
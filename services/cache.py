@@ -0,0 +1,76 @@
+"""Redis cache shared across app workers.
+
+Caching is optional: when REDIS_URL is not configured every lookup misses and
+writes are no-ops, so callers always fall back to the database. Redis errors
+are logged and treated the same way rather than failing the request.
+"""
+
+import logging
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Serialized public package listing (see routers/packages.py)
+ACTIVE_PACKAGES_KEY = "packages:active:v1"
+ACTIVE_PACKAGES_TTL_SECONDS = 60
+
+# Extracted PDF text, keyed by backend and content digest (see pdf_extractor)
+PDF_TEXT_KEY_PREFIX = "pdftext:v1:"
+
+_client: Redis | None = None
+
+
+def get_redis() -> Redis | None:
+    """Return the shared Redis client, or None if caching is disabled."""
+    global _client
+    if not REDIS_URL:
+        return None
+    if _client is None:
+        _client = Redis.from_url(REDIS_URL)
+    return _client
+
+
+async def cache_get(key: str) -> bytes | None:
+    """Fetch a cached value, returning None on a miss or Redis error."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return await client.get(key)
+    except RedisError as e:
+        logger.warning("Redis GET %s failed: %s", key, e)
+        return None
+
+
+async def cache_set(key: str, value: bytes, ttl_seconds: int) -> None:
+    """Store a value with an expiry, ignoring Redis errors."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.set(key, value, ex=ttl_seconds)
+    except RedisError as e:
+        logger.warning("Redis SET %s failed: %s", key, e)
+
+
+async def cache_delete(key: str) -> None:
+    """Invalidate a cached value, ignoring Redis errors."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.delete(key)
+    except RedisError as e:
+        logger.warning("Redis DEL %s failed: %s", key, e)
+
+
+async def close_cache() -> None:
+    """Close the Redis connection pool (called on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
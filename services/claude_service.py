@@ -1,29 +1,74 @@
+import asyncio
 import base64
-import json
+import io
+import re
+from collections.abc import AsyncIterator
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from pathlib import Path
 
-from anthropic import Anthropic
+import orjson
+from anthropic import AsyncAnthropic, Timeout
+from PIL import Image, UnidentifiedImageError
 
 from config import ANTHROPIC_API_KEY, CLAUDE_MODEL
-from services.pdf_extractor import download_file, extract_text_from_pdf_bytes
+from services.pdf_extractor import (
+    download_file,
+    download_to_disk,
+    extract_text_from_pdf_file_async,
+)
 from services.prompts import SYSTEM_PROMPT_DEFAULT, SYSTEM_PROMPT_SCOTLAND
 
+# One client per process so its connection pool to api.anthropic.com stays warm
+client = AsyncAnthropic(
+    api_key=ANTHROPIC_API_KEY,
+    max_retries=2,
+    # Long read budget for generation, but fail fast on an unreachable host
+    timeout=Timeout(120.0, connect=5.0),
+)
+
+CV_EXTRACTION_ERROR = (
+    "CV text extraction failed or CV appears to be empty. "
+    "Please ensure the CV is a text-based PDF (not a scanned image). "
+    "If the CV is a scanned document, please convert it to a text-based PDF first."
+)
+
+# Claude downsamples anything larger, so bigger images only cost upload time
+VISION_MAX_SIDE = 1568
+# Images under this size are sent untouched
+IMAGE_RESIZE_THRESHOLD_BYTES = 512_000
+
+# Whitespace runs in extracted PDF text that only cost prompt tokens
+_INLINE_SPACE_RE = re.compile(r"[ \t\f\v]+")
+_TRAILING_SPACE_RE = re.compile(r" *\n *")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# Static configuration files, read once rather than on every generation
+_DATA_DIR = Path(__file__).parent.parent
+_STATEMENT_FORMATS = orjson.loads((_DATA_DIR / "statement_formats.json").read_bytes())
+_TRUST_VALUES = orjson.loads((_DATA_DIR / "trust_values.json").read_bytes())
+
+# Casefolded lookups built once so matching doesn't re-fold every key
+_TRUST_VALUES_FOLDED = {key.casefold(): info for key, info in _TRUST_VALUES.items()}
+_SCOTLAND_TRUSTS_FOLDED = tuple(
+    trust.casefold()
+    for trust in _STATEMENT_FORMATS.get("scotland_3_questions", {}).get("trusts", [])
+)
+
 
 def load_statement_formats() -> dict:
-    """Load statement formats configuration from JSON file."""
-    formats_path = Path(__file__).parent.parent / "statement_formats.json"
-    with open(formats_path, "r") as f:
-        return json.load(f)
+    """Return the statement formats configuration (parsed once at import)."""
+    return _STATEMENT_FORMATS
 
 
+@lru_cache(maxsize=256)
 def get_statement_format(trust_name: str) -> str:
     """Determine which statement format to use based on the trust."""
-    formats = load_statement_formats()
+    needle = trust_name.casefold()
 
     # Check if trust is in Scotland format list
-    scotland_trusts = formats.get("scotland_3_questions", {}).get("trusts", [])
-    for scotland_trust in scotland_trusts:
-        if scotland_trust.lower() in trust_name.lower() or trust_name.lower() in scotland_trust.lower():
+    for scotland_trust in _SCOTLAND_TRUSTS_FOLDED:
+        if scotland_trust in needle or needle in scotland_trust:
             return "scotland_3_questions"
 
     # Default format for all other trusts
@@ -31,66 +76,117 @@ def get_statement_format(trust_name: str) -> str:
 
 
 def load_trust_values() -> dict:
-    """Load trust values from JSON file."""
-    trust_values_path = Path(__file__).parent.parent / "trust_values.json"
-    with open(trust_values_path, "r") as f:
-        return json.load(f)
+    """Return the trust values mapping (parsed once at import)."""
+    return _TRUST_VALUES
 
 
+@lru_cache(maxsize=256)
 def get_trust_values_text(trust_name: str) -> str:
     """Get formatted trust values text for a specific trust."""
-    trust_data = load_trust_values()
+    needle = trust_name.casefold()
+
+    # Try exact match first (as given, then case-insensitive)
+    trust_info = _TRUST_VALUES.get(trust_name) or _TRUST_VALUES_FOLDED.get(needle)
 
-    # Try exact match first
-    if trust_name in trust_data:
-        trust_info = trust_data[trust_name]
+    # Fall back to partial match against the pre-casefolded keys
+    if trust_info is None:
+        for trust_key, info in _TRUST_VALUES_FOLDED.items():
+            if needle in trust_key or trust_key in needle:
+                trust_info = info
+                break
+
+    if trust_info is not None:
         values_list = ", ".join(trust_info["values"])
         return f"Trust Values: {values_list}\nDescription: {trust_info['description']}"
 
-    # Try partial match (case-insensitive)
-    trust_name_lower = trust_name.lower()
-    for trust_key, trust_info in trust_data.items():
-        if trust_name_lower in trust_key.lower() or trust_key.lower() in trust_name_lower:
-            values_list = ", ".join(trust_info["values"])
-            return f"Trust Values: {values_list}\nDescription: {trust_info['description']}"
-
     # If no match found, return generic NHS values
     return "Trust Values: Not specified (please use general NHS values: Compassion, Respect, Excellence, Teamwork)"
 
 
-async def generate_supporting_info(
+def compact_whitespace(text: str) -> str:
+    """Collapse space runs and blank lines left over from PDF extraction."""
+    text = _INLINE_SPACE_RE.sub(" ", text)
+    text = _TRAILING_SPACE_RE.sub("\n", text)
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def encode_image(data: bytes, media_type: str) -> tuple[str, str]:
+    """Base64-encode an image for Claude, downscaling large ones first.
+
+    Images over IMAGE_RESIZE_THRESHOLD_BYTES are fitted within
+    VISION_MAX_SIDE and re-encoded as JPEG, with any transparency
+    flattened onto white. Anything Pillow can't read is sent as-is.
+
+    Returns:
+        Tuple of (base64 data, media type)
+    """
+    if len(data) > IMAGE_RESIZE_THRESHOLD_BYTES:
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                img.thumbnail((VISION_MAX_SIDE, VISION_MAX_SIDE))
+                if img.mode in ("RGBA", "LA") or "transparency" in img.info:
+                    # JPEG has no alpha; flatten onto white so transparent
+                    # areas don't turn black
+                    rgba = img.convert("RGBA")
+                    rgb = Image.new("RGB", rgba.size, "white")
+                    rgb.paste(rgba, mask=rgba.getchannel("A"))
+                else:
+                    rgb = img.convert("RGB")
+                buf = io.BytesIO()
+                rgb.save(buf, "JPEG", quality=85, optimize=True)
+            if buf.tell() < len(data):
+                data, media_type = buf.getvalue(), "image/jpeg"
+        except (UnidentifiedImageError, OSError):
+            pass
+
+    return base64.standard_b64encode(data).decode("ascii"), media_type
+
+
+async def extract_cv_text(cv_url: str) -> str:
+    """Download the CV and extract its text, rejecting scans and empty files."""
+    # Stream to disk and extract in the PDF process pool so neither the
+    # event loop nor memory holds the whole file; scanned CVs have no
+    # fonts and come back empty without being parsed
+    async with download_to_disk(cv_url) as (cv_path, cv_digest):
+        try:
+            cv_text = await extract_text_from_pdf_file_async(cv_path, cv_digest)
+        except (TimeoutError, BrokenProcessPool):
+            raise ValueError(CV_EXTRACTION_ERROR)
+
+    # Check if CV extraction was successful
+    if not cv_text or len(cv_text.strip()) < 50:
+        raise ValueError(CV_EXTRACTION_ERROR)
+
+    return compact_whitespace(cv_text)
+
+
+async def build_message_params(
     name: str,
     role: str,
     trust: str,
     cv_url: str,
     person_spec_url: str,
     person_spec_mimetype: str,
-) -> str:
-    """Download CV + Person Spec, feed both to Claude, return the statement."""
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
+) -> dict:
+    """Download CV + Person Spec and build the Claude messages request."""
 
-    # Download files in parallel
-    import asyncio
+    # Download both files under one task group so a failure on either side
+    # cancels the other; the CV is parsed while the Person Spec downloads
+    try:
+        async with asyncio.TaskGroup() as tg:
+            ps_task = tg.create_task(download_file(person_spec_url))
+            cv_text = await extract_cv_text(cv_url)
+    except ExceptionGroup as eg:
+        # Callers expect the underlying error (e.g. the CV ValueError)
+        raise eg.exceptions[0] from None
+    ps_bytes = ps_task.result()
 
-    cv_bytes, ps_bytes = await asyncio.gather(
-        download_file(cv_url),
-        download_file(person_spec_url),
+    # Shrink and encode Person Spec image for Claude vision, then drop the raw
+    # bytes so only the encoded copy stays alive while the request is in flight
+    ps_base64, media_type = await asyncio.to_thread(
+        encode_image, ps_bytes, person_spec_mimetype
     )
-
-    # Extract CV text from PDF
-    cv_text = extract_text_from_pdf_bytes(cv_bytes)
-
-    # Check if CV extraction was successful
-    if not cv_text or len(cv_text.strip()) < 50:
-        raise ValueError(
-            "CV text extraction failed or CV appears to be empty. "
-            "Please ensure the CV is a text-based PDF (not a scanned image). "
-            "If the CV is a scanned document, please convert it to a text-based PDF first."
-        )
-
-    # Encode Person Spec image for Claude vision
-    ps_base64 = base64.standard_b64encode(ps_bytes).decode("utf-8")
-    media_type = person_spec_mimetype
+    del ps_bytes
 
     # Get trust values and determine format
     trust_values_text = get_trust_values_text(trust)
@@ -106,16 +202,21 @@ async def generate_supporting_info(
         word_limit = "1,500"
         format_description = "standard NHS England format"
 
-    user_prompt = (
+    # Trust-specific text goes first so it forms a stable, cacheable prefix
+    # shared by every submission for the same trust
+    trust_prompt = (
         f"⚠️ CRITICAL: The Supporting Information MUST NOT EXCEED {word_limit} WORDS. This is a hard limit. ⚠️\n\n"
-        f"Please generate Supporting Information for the following application:\n\n"
-        f"Candidate: {name}\n"
-        f"Role: {role}\n"
         f"NHS Trust: {trust}\n"
         f"Format: {format_description}\n\n"
         f"--- TRUST VALUES ---\n"
         f"{trust_values_text}\n"
-        f"--- END TRUST VALUES ---\n\n"
+        f"--- END TRUST VALUES ---"
+    )
+
+    user_prompt = (
+        f"Please generate Supporting Information for the following application:\n\n"
+        f"Candidate: {name}\n"
+        f"Role: {role}\n\n"
         f"--- CV TEXT ---\n"
         f"{cv_text}\n"
         f"--- END CV ---\n\n"
@@ -133,15 +234,28 @@ async def generate_supporting_info(
         f"Provide the full trimmed response that is ready to use. ⚠️"
     )
 
-    message = client.messages.create(
+    return dict(
         model=CLAUDE_MODEL,
         max_tokens=4000,
         temperature=0.8,
-        system=system_prompt,
+        # The system prompt is identical for every request of a format, so
+        # let Anthropic cache it and bill repeat reads at the cached rate
+        system=[
+            {
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ],
         messages=[
             {
                 "role": "user",
                 "content": [
+                    {
+                        "type": "text",
+                        "text": trust_prompt,
+                        "cache_control": {"type": "ephemeral"},
+                    },
                     {
                         "type": "image",
                         "source": {
@@ -159,4 +273,19 @@ async def generate_supporting_info(
         ],
     )
 
-    return message.content[0].text
+
+async def generate_supporting_info_stream(
+    name: str,
+    role: str,
+    trust: str,
+    cv_url: str,
+    person_spec_url: str,
+    person_spec_mimetype: str,
+) -> AsyncIterator[str]:
+    """Download CV + Person Spec, feed both to Claude, yield the statement as it streams."""
+    params = await build_message_params(
+        name, role, trust, cv_url, person_spec_url, person_spec_mimetype
+    )
+    async with client.messages.stream(**params) as stream:
+        async for text in stream.text_stream:
+            yield text
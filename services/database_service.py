@@ -1,12 +1,49 @@
 """Database service for credit management and user operations."""
 
 import uuid
+from collections.abc import AsyncIterator, Sequence
 from datetime import datetime
 
-from sqlalchemy import select, update
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    lambda_stmt,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from database.models import AdminUser, CreditUsage, Package, Purchase, User
+from services import cache
+
+
+# Rows fetched per round-trip when streaming the user export
+USER_STREAM_BATCH_SIZE = 500
+
+
+class InsufficientCreditsError(ValueError):
+    """Raised when a user has no credits left (or doesn't exist)."""
+
+
+class DuplicateSubmissionError(ValueError):
+    """Raised when credit usage for a submission has already been logged."""
+
+
+# True when a user's unlimited subscription is active (no expiry or not yet
+# expired); evaluated by the database so charging stays a single statement.
+UNLIMITED_ACTIVE = and_(
+    User.is_unlimited.is_(True),
+    or_(User.unlimited_expires_at.is_(None), User.unlimited_expires_at > func.now()),
+)
 
 
 # =============================================================================
@@ -24,39 +61,18 @@ async def get_or_create_user(db: AsyncSession, email: str) -> User:
     Returns:
         User object
     """
-    # Try to get existing user
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-
-    if user:
-        return user
-
-    # Create new user with 0 credits
-    new_user = User(
-        id=uuid.uuid4(),
-        email=email,
-        credits=0,
-        is_unlimited=False,
-        unlimited_expires_at=None,
+    # Insert-or-return in one statement; the no-op DO UPDATE makes RETURNING
+    # yield the existing row, and concurrent first purchases can't collide
+    result = await db.execute(
+        pg_insert(User)
+        .values(email=email, credits=0, is_unlimited=False, unlimited_expires_at=None)
+        .on_conflict_do_update(index_elements=[User.email], set_={"email": email})
+        .returning(User),
+        execution_options={"populate_existing": True},
     )
-    db.add(new_user)
+    user = result.scalar_one()
     await db.commit()
-    await db.refresh(new_user)
-    return new_user
-
-
-async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
-    """Get user by email address.
-
-    Args:
-        db: Database session
-        email: User's email address
-
-    Returns:
-        User object or None if not found
-    """
-    result = await db.execute(select(User).where(User.email == email))
-    return result.scalar_one_or_none()
+    return user
 
 
 async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID) -> User | None:
@@ -74,134 +90,171 @@ async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID) -> User | None:
 
 
 async def get_all_users(
-    db: AsyncSession, offset: int = 0, limit: int = 100
-) -> list[User]:
-    """Get all users with pagination.
+    db: AsyncSession,
+    after: tuple[datetime, uuid.UUID] | None = None,
+    limit: int = 100,
+) -> Sequence[User]:
+    """Get all users, newest first, using keyset pagination.
 
     Args:
         db: Database session
-        offset: Number of records to skip
+        after: (created_at, id) of the last user on the previous page
         limit: Maximum number of records to return
 
     Returns:
         List of User objects
     """
-    result = await db.execute(
-        select(User).order_by(User.created_at.desc()).offset(offset).limit(limit)
-    )
-    return list(result.scalars().all())
-
-
-# =============================================================================
-# Credit Operations
-# =============================================================================
-
-
-async def check_user_credits(db: AsyncSession, email: str) -> tuple[bool, int]:
-    """Check if user has credits available.
-
-    Args:
-        db: Database session
-        email: User's email address
-
-    Returns:
-        Tuple of (has_credits: bool, available_credits: int)
-    """
-    user = await get_user_by_email(db, email)
-
-    if not user:
-        return False, 0
-
-    # Check if user has active unlimited subscription
-    if user.is_unlimited:
-        if user.unlimited_expires_at is None or user.unlimited_expires_at > datetime.utcnow():
-            return True, -1  # -1 indicates unlimited
+    query = select(User).order_by(User.created_at.desc(), User.id.desc()).limit(limit)
+    if after is not None:
+        query = query.where(tuple_(User.created_at, User.id) < after)
+    result = await db.execute(query)
+    return result.scalars().all()
 
-    # Check regular credits
-    return user.credits > 0, user.credits
 
+async def stream_all_users(db: AsyncSession) -> AsyncIterator[User]:
+    """Yield every user, newest first, from a server-side cursor.
 
-async def deduct_credit(db: AsyncSession, user_id: uuid.UUID, credits: int = 1) -> None:
-    """Deduct credits from user's balance.
+    Rows are fetched in batches of USER_STREAM_BATCH_SIZE so exports never
+    hold the whole table in memory.
 
     Args:
         db: Database session
-        user_id: User's UUID
-        credits: Number of credits to deduct (default: 1)
 
-    Raises:
-        ValueError: If user doesn't have enough credits
+    Yields:
+        User objects
     """
-    user = await get_user_by_id(db, user_id)
-
-    if not user:
-        raise ValueError(f"User {user_id} not found")
-
-    # Don't deduct if unlimited subscription is active
-    if user.is_unlimited:
-        if user.unlimited_expires_at is None or user.unlimited_expires_at > datetime.utcnow():
-            return
+    result = await db.stream(
+        select(User)
+        .order_by(User.created_at.desc(), User.id.desc())
+        .execution_options(yield_per=USER_STREAM_BATCH_SIZE)
+    )
+    async for user in result.scalars():
+        yield user
 
-    if user.credits < credits:
-        raise ValueError(f"User {user_id} has insufficient credits")
 
-    await db.execute(
-        update(User)
-        .where(User.id == user_id)
-        .values(credits=User.credits - credits, updated_at=datetime.utcnow())
-    )
-    await db.commit()
+# =============================================================================
+# Credit Operations
+# =============================================================================
 
 
-async def add_credits(db: AsyncSession, user_id: uuid.UUID, credits: int) -> None:
+async def add_credits(
+    db: AsyncSession, user_id: uuid.UUID, credits: int, commit: bool = True
+) -> None:
     """Add credits to user's balance.
 
     Args:
         db: Database session
         user_id: User's UUID
         credits: Number of credits to add
+        commit: Commit immediately; pass False to leave it to the caller
     """
     await db.execute(
         update(User)
         .where(User.id == user_id)
-        .values(credits=User.credits + credits, updated_at=datetime.utcnow())
+        .values(credits=User.credits + credits, updated_at=func.now())
     )
-    await db.commit()
+    if commit:
+        await db.commit()
 
 
-async def log_credit_usage(
+async def reserve_credit(
     db: AsyncSession,
-    user_id: uuid.UUID,
-    credits_used: int,
+    email: str,
     role: str,
     trust: str,
     submission_id: str,
-) -> CreditUsage:
-    """Log credit usage for audit trail.
+    credits: int = 1,
+) -> int:
+    """Deduct credits and log the usage in a single statement.
+
+    Runs ``WITH charged AS (UPDATE users ... RETURNING id) INSERT INTO
+    credit_usage SELECT ... FROM charged`` so the balance check, deduction and
+    audit row happen in one round-trip with no race between them. Called
+    before generation starts; use refund_credit if generation fails.
+    Unlimited subscribers are not charged but the usage is still logged.
 
     Args:
         db: Database session
-        user_id: User's UUID
-        credits_used: Number of credits used
+        email: User's email address
         role: Job role
         trust: NHS trust
         submission_id: Tally submission ID
+        credits: Number of credits to deduct (default: 1)
 
     Returns:
-        CreditUsage object
+        Number of credits actually deducted (0 for unlimited subscribers)
+
+    Raises:
+        InsufficientCreditsError: If user doesn't exist or has insufficient credits
+        DuplicateSubmissionError: If this submission was already charged
+    """
+    charged = (
+        update(User)
+        .where(User.email == email, or_(UNLIMITED_ACTIVE, User.credits >= credits))
+        .values(
+            credits=case((UNLIMITED_ACTIVE, User.credits), else_=User.credits - credits),
+            updated_at=func.now(),
+        )
+        .returning(
+            User.id,
+            case((UNLIMITED_ACTIVE, 0), else_=credits).label("deducted"),
+        )
+        .cte("charged")
+    )
+    try:
+        result = await db.execute(
+            insert(CreditUsage)
+            .from_select(
+                ["user_id", "credits_used", "role", "trust", "submission_id"],
+                select(
+                    charged.c.id,
+                    literal(credits),
+                    literal(role),
+                    literal(trust),
+                    literal(submission_id),
+                ),
+            )
+            .returning(select(charged.c.deducted).scalar_subquery())
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise DuplicateSubmissionError(f"Submission {submission_id} already charged")
+
+    deducted = result.scalar_one_or_none()
+
+    if deducted is None:
+        await db.rollback()
+        raise InsufficientCreditsError(f"User {email} has insufficient credits")
+
+    await db.commit()
+    return deducted
+
+
+async def refund_credit(db: AsyncSession, submission_id: str, credits: int) -> None:
+    """Undo a reservation made by reserve_credit.
+
+    Deletes the submission's usage row and returns the deducted credits in
+    one statement, so a later redelivery of the submission can be charged
+    again.
+
+    Args:
+        db: Database session
+        submission_id: Tally submission ID
+        credits: Number of credits that were deducted
     """
-    usage = CreditUsage(
-        id=uuid.uuid4(),
-        user_id=user_id,
-        credits_used=credits_used,
-        role=role,
-        trust=trust,
-        submission_id=submission_id,
+    released = (
+        delete(CreditUsage)
+        .where(CreditUsage.submission_id == submission_id)
+        .returning(CreditUsage.user_id)
+        .cte("released")
+    )
+    await db.execute(
+        update(User)
+        .where(User.id.in_(select(released.c.user_id)))
+        .values(credits=User.credits + credits, updated_at=func.now())
+        .add_cte(released)
     )
-    db.add(usage)
     await db.commit()
-    await db.refresh(usage)
-    return usage
 
 
 # =============================================================================
@@ -210,44 +263,60 @@ async def log_credit_usage(
 
 
 async def activate_subscription(
-    db: AsyncSession, user_id: uuid.UUID, expires_at: datetime | None = None
-) -> None:
+    db: AsyncSession, email: str, expires_at: datetime | None = None
+) -> uuid.UUID | None:
     """Activate unlimited subscription for user.
 
+    Looks the user up and updates them in one statement.
+
     Args:
         db: Database session
-        user_id: User's UUID
+        email: User's email address
         expires_at: Expiration datetime (None for never expires)
+
+    Returns:
+        The user's UUID, or None if no user has that email
     """
-    await db.execute(
+    result = await db.execute(
         update(User)
-        .where(User.id == user_id)
+        .where(User.email == email)
         .values(
             is_unlimited=True,
             unlimited_expires_at=expires_at,
-            updated_at=datetime.utcnow(),
+            updated_at=func.now(),
         )
+        .returning(User.id)
     )
+    user_id = result.scalar_one_or_none()
     await db.commit()
+    return user_id
 
 
-async def deactivate_subscription(db: AsyncSession, user_id: uuid.UUID) -> None:
+async def deactivate_subscription(db: AsyncSession, email: str) -> uuid.UUID | None:
     """Deactivate unlimited subscription for user.
 
+    Looks the user up and updates them in one statement.
+
     Args:
         db: Database session
-        user_id: User's UUID
+        email: User's email address
+
+    Returns:
+        The user's UUID, or None if no user has that email
     """
-    await db.execute(
+    result = await db.execute(
         update(User)
-        .where(User.id == user_id)
+        .where(User.email == email)
         .values(
             is_unlimited=False,
             unlimited_expires_at=None,
-            updated_at=datetime.utcnow(),
+            updated_at=func.now(),
         )
+        .returning(User.id)
     )
+    user_id = result.scalar_one_or_none()
     await db.commit()
+    return user_id
 
 
 # =============================================================================
@@ -255,9 +324,12 @@ async def deactivate_subscription(db: AsyncSession, user_id: uuid.UUID) -> None:
 # =============================================================================
 
 
-async def get_active_packages(db: AsyncSession) -> list[Package]:
+async def get_active_packages(db: AsyncSession) -> Sequence[Package]:
     """Get all active packages ordered by display_order.
 
+    Always reads the database: the only caller refills the shared Redis
+    listing, which must not be rebuilt from a per-process copy.
+
     Args:
         db: Database session
 
@@ -269,7 +341,7 @@ async def get_active_packages(db: AsyncSession) -> list[Package]:
         .where(Package.is_active == True)  # noqa: E712
         .order_by(Package.display_order)
     )
-    return list(result.scalars().all())
+    return result.scalars().all()
 
 
 async def get_package_by_id(db: AsyncSession, package_id: uuid.UUID) -> Package | None:
@@ -282,11 +354,14 @@ async def get_package_by_id(db: AsyncSession, package_id: uuid.UUID) -> Package
     Returns:
         Package object or None if not found
     """
-    result = await db.execute(select(Package).where(Package.id == package_id))
+    # lambda_stmt caches the constructed statement too, not just its SQL
+    result = await db.execute(
+        lambda_stmt(lambda: select(Package).where(Package.id == package_id))
+    )
     return result.scalar_one_or_none()
 
 
-async def get_all_packages(db: AsyncSession) -> list[Package]:
+async def get_all_packages(db: AsyncSession) -> Sequence[Package]:
     """Get all packages (including inactive) for admin view.
 
     Args:
@@ -296,7 +371,7 @@ async def get_all_packages(db: AsyncSession) -> list[Package]:
         List of all Package objects
     """
     result = await db.execute(select(Package).order_by(Package.display_order))
-    return list(result.scalars().all())
+    return result.scalars().all()
 
 
 async def create_package(
@@ -324,20 +399,23 @@ async def create_package(
     Returns:
         Created Package object
     """
-    package = Package(
-        id=uuid.uuid4(),
-        name=name,
-        description=description,
-        package_type=package_type,
-        credits=credits,
-        price_gbp=price_gbp,
-        stripe_price_id=stripe_price_id,
-        is_active=True,
-        display_order=display_order,
+    # RETURNING brings back the server defaults, so no refresh is needed
+    result = await db.execute(
+        insert(Package)
+        .values(
+            name=name,
+            description=description,
+            package_type=package_type,
+            credits=credits,
+            price_pence=round(price_gbp * 100),
+            stripe_price_id=stripe_price_id,
+            is_active=True,
+            display_order=display_order,
+        )
+        .returning(Package)
     )
-    db.add(package)
+    package = result.scalar_one()
     await db.commit()
-    await db.refresh(package)
     return package
 
 
@@ -348,6 +426,10 @@ async def update_package(
 ) -> Package | None:
     """Update package fields.
 
+    Runs as a single UPDATE ... RETURNING that only matches when at least
+    one field differs from the stored row, so a no-op update writes
+    nothing and keeps the cache.
+
     Args:
         db: Database session
         package_id: Package UUID
@@ -356,17 +438,35 @@ async def update_package(
     Returns:
         Updated Package object or None if not found
     """
-    package = await get_package_by_id(db, package_id)
-    if not package:
-        return None
-
+    columns = Package.__table__.c
+    values = {}
     for key, value in kwargs.items():
-        if hasattr(package, key):
-            setattr(package, key, value)
+        if key == "price_gbp":
+            key, value = "price_pence", round(value * 100)
+        if key in columns:
+            values[key] = value
+
+    if not values:
+        return await get_package_by_id(db, package_id)
+
+    result = await db.execute(
+        update(Package)
+        .where(
+            Package.id == package_id,
+            or_(*(columns[key].is_distinct_from(value) for key, value in values.items())),
+        )
+        .values(**values, updated_at=func.now())
+        .returning(Package),
+        execution_options={"populate_existing": True},
+    )
+    package = result.scalar_one_or_none()
+
+    if package is None:
+        # Either the package doesn't exist or nothing changed
+        return await get_package_by_id(db, package_id)
 
-    package.updated_at = datetime.utcnow()
     await db.commit()
-    await db.refresh(package)
+    await cache.cache_delete(cache.ACTIVE_PACKAGES_KEY)
     return package
 
 
@@ -398,6 +498,7 @@ async def create_purchase(
     credits_purchased: int | None = None,
     stripe_subscription_id: str | None = None,
     status: str = "pending",
+    commit: bool = True,
 ) -> Purchase:
     """Create a purchase record.
 
@@ -410,71 +511,89 @@ async def create_purchase(
         credits_purchased: Number of credits purchased (None for unlimited)
         stripe_subscription_id: Stripe Subscription ID (for recurring)
         status: Purchase status (default: 'pending')
+        commit: Commit immediately; pass False to leave it to the caller
 
     Returns:
         Created Purchase object
     """
-    purchase = Purchase(
-        id=uuid.uuid4(),
-        user_id=user_id,
-        package_id=package_id,
-        stripe_session_id=stripe_session_id,
-        stripe_subscription_id=stripe_subscription_id,
-        credits_purchased=credits_purchased,
-        amount_gbp=amount_gbp,
-        status=status,
+    # RETURNING brings back the server defaults, so no refresh is needed
+    result = await db.execute(
+        insert(Purchase)
+        .values(
+            user_id=user_id,
+            package_id=package_id,
+            stripe_session_id=stripe_session_id,
+            stripe_subscription_id=stripe_subscription_id,
+            credits_purchased=credits_purchased,
+            amount_pence=round(amount_gbp * 100),
+            status=status,
+        )
+        .returning(Purchase)
     )
-    db.add(purchase)
-    await db.commit()
-    await db.refresh(purchase)
+    purchase = result.scalar_one()
+    if commit:
+        await db.commit()
     return purchase
 
 
-async def update_purchase_status(
-    db: AsyncSession, stripe_session_id: str, status: str
-) -> Purchase | None:
-    """Update purchase status by Stripe session ID.
+async def complete_purchase(
+    db: AsyncSession, stripe_session_id: str, commit: bool = True
+) -> tuple[uuid.UUID, Package] | None:
+    """Mark a purchase completed and load its package in one round trip.
+
+    The status UPDATE runs as a CTE joined to packages, so the webhook gets
+    everything it needs to grant credits from a single statement.
 
     Args:
         db: Database session
         stripe_session_id: Stripe Checkout Session ID
-        status: New status ('completed', 'failed', 'refunded')
+        commit: Commit immediately; pass False to leave it to the caller
 
     Returns:
-        Updated Purchase object or None if not found
+        (user_id, package) for the purchase, or None if not found or
+        already completed (so redelivered Stripe events are not applied
+        twice)
     """
+    completed = (
+        update(Purchase)
+        .where(
+            Purchase.stripe_session_id == stripe_session_id,
+            Purchase.status != "completed",
+        )
+        .values(status="completed")
+        .returning(Purchase.user_id, Purchase.package_id)
+        .cte("completed")
+    )
     result = await db.execute(
-        select(Purchase).where(Purchase.stripe_session_id == stripe_session_id)
+        select(completed.c.user_id, Package).join(
+            Package, Package.id == completed.c.package_id
+        )
     )
-    purchase = result.scalar_one_or_none()
-
-    if not purchase:
-        return None
-
-    purchase.status = status
-    await db.commit()
-    await db.refresh(purchase)
-    return purchase
+    row = result.one_or_none()
+    if commit:
+        await db.commit()
+    return None if row is None else (row.user_id, row.Package)
 
 
 async def get_user_purchases(
     db: AsyncSession, user_id: uuid.UUID
-) -> list[Purchase]:
-    """Get all purchases for a user.
+) -> Sequence[Purchase]:
+    """Get all purchases for a user with their packages eagerly loaded.
 
     Args:
         db: Database session
         user_id: User's UUID
 
     Returns:
-        List of Purchase objects
+        List of Purchase objects with ``package`` populated
     """
     result = await db.execute(
         select(Purchase)
         .where(Purchase.user_id == user_id)
+        .options(selectinload(Purchase.package))
         .order_by(Purchase.purchased_at.desc())
     )
-    return list(result.scalars().all())
+    return result.scalars().all()
 
 
 # =============================================================================
@@ -492,7 +611,12 @@ async def get_admin_by_email(db: AsyncSession, email: str) -> AdminUser | None:
     Returns:
         AdminUser object or None if not found
     """
-    result = await db.execute(select(AdminUser).where(AdminUser.email == email))
+    email = email.lower()
+    result = await db.execute(
+        lambda_stmt(
+            lambda: select(AdminUser).where(func.lower(AdminUser.email) == email)
+        )
+    )
     return result.scalar_one_or_none()
 
 
@@ -510,7 +634,6 @@ async def create_admin_user(
         Created AdminUser object
     """
     admin = AdminUser(
-        id=uuid.uuid4(),
         email=email,
         password_hash=password_hash,
     )
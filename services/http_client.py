@@ -0,0 +1,31 @@
+"""Shared outbound HTTP client for Brevo and Tally file downloads."""
+
+import httpx
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient, creating it on first use.
+
+    Reusing one client keeps TCP/TLS connections alive between requests
+    instead of handshaking for every email or download. HTTP/2 is
+    negotiated where the server supports it, so a burst of Brevo sends is
+    multiplexed over one connection; other hosts fall back to HTTP/1.1.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client (called on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,23 +1,348 @@
-import io
+import asyncio
+import contextlib
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from pathlib import Path
 
-import httpx
 import pdfplumber
 
+from config import (
+    DOWNLOAD_CACHE_MAX_MB,
+    DOWNLOAD_CACHE_TTL_SECONDS,
+    PDF_BACKEND,
+    PDF_EXTRACT_TIMEOUT_SECONDS,
+    PDF_MAX_PAGES,
+    PDF_TEXT_CACHE_ENABLED,
+    PDF_TEXT_CACHE_TTL_SECONDS,
+    PDF_WORKERS,
+)
+from services import cache
+from services.http_client import get_http_client
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Tally upload URLs point at immutable files, so a download can be reused
+# until it expires or is evicted (oldest first) to stay under the size cap.
+# The directory is private to this process since CVs are personal data.
+DOWNLOAD_CACHE_MAX_BYTES = DOWNLOAD_CACHE_MAX_MB * 1024 * 1024
+
+_pdf_pool: ProcessPoolExecutor | None = None
+_download_cache_dir: Path | None = None
+
 
 async def download_file(url: str) -> bytes:
     """Download a file from a Tally-hosted URL."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, follow_redirects=True, timeout=30.0)
-        response.raise_for_status()
-        return response.content
+    response = await get_http_client().get(url, follow_redirects=True, timeout=30.0)
+    response.raise_for_status()
+    return response.content
+
+
+def _url_key(url: str) -> str:
+    return hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+
+
+def _get_download_cache_dir() -> Path:
+    """Return the cache directory, creating it (mode 0700) on first use."""
+    global _download_cache_dir
+    if _download_cache_dir is None:
+        _download_cache_dir = Path(tempfile.mkdtemp(prefix="tally_downloads-"))
+    return _download_cache_dir
+
+
+def _is_expired(mtime: float) -> bool:
+    return time.time() - mtime > DOWNLOAD_CACHE_TTL_SECONDS
+
+
+def _claim_cached_download(url: str) -> tuple[str, str] | None:
+    """Hard-link a cached download of url to a private path.
+
+    The link keeps the file alive even if it is evicted while the caller
+    is still reading it. Expired entries are deleted and count as a miss.
+
+    Returns:
+        Tuple of (path of the private link, content digest), or None
+    """
+    cache_dir = _get_download_cache_dir()
+    for path in cache_dir.glob(f"{_url_key(url)}-*"):
+        try:
+            if _is_expired(path.stat().st_mtime):
+                path.unlink(missing_ok=True)
+                continue
+            link = cache_dir / f".claim-{uuid.uuid4().hex}"
+            os.link(path, link)
+        except FileNotFoundError:
+            # Evicted by a concurrent download
+            continue
+        return str(link), path.name.partition("-")[2]
+    return None
+
+
+def _publish_download(path: str, cached_path: Path) -> None:
+    """Link a finished download into the cache and evict old entries.
+
+    The caller keeps its own link at ``path``, so eviction never removes
+    a file that is still in use. Expired entries are always deleted, then
+    the oldest until the cache is under the size cap.
+    """
+    with contextlib.suppress(FileExistsError):
+        os.link(path, cached_path)
+
+    entries = []
+    for entry in cached_path.parent.iterdir():
+        if entry == cached_path or entry.name.startswith("."):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        if _is_expired(stat.st_mtime):
+            entry.unlink(missing_ok=True)
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+
+    total = os.stat(path).st_size + sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total <= DOWNLOAD_CACHE_MAX_BYTES:
+            break
+        entry.unlink(missing_ok=True)
+        total -= size
+
+
+def _unlink(path: str) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+@asynccontextmanager
+async def download_to_disk(url: str) -> AsyncIterator[tuple[str, str]]:
+    """Stream a Tally-hosted file to disk, reusing an earlier download.
+
+    The body never has to sit in memory in full, and the path can be
+    handed to the PDF process pool without pickling the file contents.
+    The content digest is computed on the fly from the same chunks.
+
+    With DOWNLOAD_CACHE_MAX_MB set, downloads are kept in a private cache
+    directory keyed by URL for DOWNLOAD_CACHE_TTL_SECONDS, so a repeat of
+    the same URL skips the network. The yielded path is always the
+    caller's own and is removed on exit.
+
+    Yields:
+        Tuple of (path of the downloaded file, hex BLAKE2b digest)
+    """
+    cache_dir = None
+    if DOWNLOAD_CACHE_MAX_BYTES:
+        cache_dir = await asyncio.to_thread(_get_download_cache_dir)
+        cached = await asyncio.to_thread(_claim_cached_download, url)
+        if cached is not None:
+            try:
+                yield cached
+            finally:
+                await asyncio.to_thread(_unlink, cached[0])
+            return
+
+    fd, path = await asyncio.to_thread(
+        tempfile.mkstemp, dir=cache_dir, prefix=".partial-"
+    )
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        with os.fdopen(fd, "wb") as f:
+            async with get_http_client().stream(
+                "GET", url, follow_redirects=True, timeout=30.0
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+
+        if cache_dir is not None:
+            cached_path = cache_dir / f"{_url_key(url)}-{digest.hexdigest()}"
+            await asyncio.to_thread(_publish_download, path, cached_path)
+
+        yield path, digest.hexdigest()
+    finally:
+        await asyncio.to_thread(_unlink, path)
+
+
+def has_no_fonts(pdf_bytes: bytes | mmap.mmap) -> bool:
+    """Cheaply tell whether a PDF cannot contain extractable text.
+
+    Text needs a font resource. When the file has no compressed object
+    streams, every dictionary is stored in plain bytes, so a missing
+    ``/Font`` means the PDF is image-only (e.g. a scan). Files that use
+    object streams can hide their fonts, so they are never flagged.
+    """
+    return pdf_bytes.find(b"/ObjStm") == -1 and pdf_bytes.find(b"/Font") == -1
 
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
-    """Extract all text from a PDF using pdfplumber."""
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+def extract_text_from_pdf(path: str) -> str:
+    """Extract all text from a PDF on disk, one paragraph break between pages.
+
+    Uses pdfplumber unless PDF_BACKEND=pymupdf. Only the first
+    PDF_MAX_PAGES pages are read, and pages without text (scanned images,
+    graphics) are dropped.
+
+    Args:
+        path: Path of the PDF on disk
+    """
+    if PDF_BACKEND == "pymupdf":
+        return _extract_text_pymupdf(path)
+    return _extract_text_pdfplumber(path)
+
+
+def _extract_text_pymupdf(path: str) -> str:
+    """Extract all text from a PDF using PyMuPDF.
+
+    Much faster than pdfminer, but PyMuPDF is AGPL-3.0 licensed (or
+    commercially licensed by Artifex), so it is not a listed dependency
+    and must be installed separately by deployments cleared to use it.
+    Pages that reference no fonts are skipped without parsing their
+    content streams.
+    """
+    import pymupdf
+
+    with pymupdf.open(path, filetype="pdf") as doc:
+        pages = [
+            text
+            for page in doc.pages(0, min(doc.page_count, PDF_MAX_PAGES))
+            if page.get_fonts()
+            and (text := page.get_text("text", sort=False).strip())
+        ]
+    return "\n\n".join(pages)
+
+
+def _extract_text_pdfplumber(path: str) -> str:
+    """Extract all text from a PDF using pdfplumber.
+
+    laparams is left unset on purpose: pdfplumber then skips pdfminer's
+    layout analysis entirely and clusters characters itself.
+    """
+    with pdfplumber.open(path, pages=range(1, PDF_MAX_PAGES + 1)) as pdf:
+        # Each extract_text() call reruns the layout analysis, so call it
+        # once, and not at all for pages without characters (reading
+        # page.chars still parses the content stream)
         pages = [
-            page.extract_text()
+            text
             for page in pdf.pages
-            if page.extract_text()
+            if page.chars and (text := page.extract_text())
         ]
     return "\n\n".join(pages)
+
+
+def extract_text_from_pdf_file(path: str) -> str:
+    """Extract text from a PDF on disk, or return "" if it has no fonts.
+
+    The font check scans a read-only mapping of the file, so image-only
+    scans are rejected without reading them into memory or parsing them.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if has_no_fonts(data):
+                return ""
+    return extract_text_from_pdf(path)
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the process pool used for PDF extraction, creating it on first use.
+
+    Neither backend releases the GIL while parsing, so threads would still
+    serialise; separate processes let concurrent submissions extract on
+    separate cores.
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pdf_pool
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """Kill a pool's processes and drop it so the next parse gets a new one.
+
+    A timed-out future cannot be cancelled once a worker has picked it up,
+    so the only way to stop a runaway parse is to kill the process.
+    """
+    global _pdf_pool
+    if _pdf_pool is pool:
+        _pdf_pool = None
+    # ProcessPoolExecutor has no public way to kill busy workers before 3.14
+    # Queued and running work then fails with BrokenProcessPool, which
+    # other callers retry on the replacement pool
+    for process in list((pool._processes or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False)
+
+
+async def extract_text_from_pdf_file_async(path: str, digest: str) -> str:
+    """Extract PDF text in the process pool without blocking the event loop.
+
+    Only the path crosses the process boundary; see
+    extract_text_from_pdf_file. With PDF_TEXT_CACHE_ENABLED, results are
+    cached in Redis by content digest for PDF_TEXT_CACHE_TTL_SECONDS, so a
+    resubmitted CV (e.g. after buying credits) is not parsed again.
+
+    Args:
+        path: Path of the PDF on disk
+        digest: Content digest from download_to_disk
+
+    Raises:
+        TimeoutError: If extraction takes longer than
+            PDF_EXTRACT_TIMEOUT_SECONDS (pathological layouts). The pool
+            is killed and replaced, so the runaway parse does not keep a
+            worker busy.
+        BrokenProcessPool: If the parse crashed its worker process
+    """
+    key = f"{cache.PDF_TEXT_KEY_PREFIX}{PDF_BACKEND}:{digest}"
+    if PDF_TEXT_CACHE_ENABLED:
+        cached = await cache.cache_get(key)
+        if cached is not None:
+            return cached.decode()
+
+    loop = asyncio.get_running_loop()
+    pool = get_pdf_pool()
+    try:
+        async with asyncio.timeout(PDF_EXTRACT_TIMEOUT_SECONDS):
+            while True:
+                try:
+                    text = await loop.run_in_executor(
+                        pool, extract_text_from_pdf_file, path
+                    )
+                    break
+                except BrokenProcessPool:
+                    # Killed because another parse timed out; retry on
+                    # the replacement pool within the same deadline
+                    if pool is _pdf_pool:
+                        raise
+                    pool = get_pdf_pool()
+    except (TimeoutError, BrokenProcessPool):
+        _discard_pdf_pool(pool)
+        raise
+
+    if PDF_TEXT_CACHE_ENABLED:
+        await cache.cache_set(key, text.encode(), PDF_TEXT_CACHE_TTL_SECONDS)
+    return text
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the extraction processes (called on application shutdown)."""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=True, cancel_futures=True)
+        _pdf_pool = None
+
+
+def remove_download_cache() -> None:
+    """Delete the download cache directory (called on application shutdown)."""
+    global _download_cache_dir
+    if _download_cache_dir is not None:
+        shutil.rmtree(_download_cache_dir, ignore_errors=True)
+        _download_cache_dir = None
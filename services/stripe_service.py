@@ -9,12 +9,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from config import FRONTEND_URL, STRIPE_SECRET_KEY
 from services import database_service
 
-# Configure Stripe
+# Configure Stripe. The httpx-backed client serves both the sync and the
+# *_async calls, so Stripe requests never block the event loop.
 stripe.api_key = STRIPE_SECRET_KEY
+stripe.default_http_client = stripe.HTTPXClient()
+# The SDK reuses one generated Idempotency-Key across its own retries of a
+# POST, so a retried create can't produce a duplicate
+stripe.max_network_retries = 2
 
 logger = logging.getLogger(__name__)
 
 
+async def close_stripe_client() -> None:
+    """Close the Stripe HTTP client's connections (called on application shutdown)."""
+    await stripe.default_http_client.close_async()
+
+
 async def create_checkout_session(
     db: AsyncSession,
     email: str,
@@ -64,7 +74,7 @@ async def create_checkout_session(
 
     try:
         # Create Stripe Checkout Session
-        session = stripe.checkout.Session.create(
+        session = await stripe.checkout.Session.create_async(
             customer_email=email,
             line_items=line_items,
             mode=mode,
@@ -83,7 +93,7 @@ async def create_checkout_session(
             user_id=user.id,
             package_id=package_id,
             stripe_session_id=session.id,
-            amount_gbp=float(package.price_gbp),
+            amount_gbp=package.price_gbp,
             credits_purchased=package.credits,
             status="pending",
         )
@@ -108,48 +118,41 @@ async def handle_checkout_completed(db: AsyncSession, session: dict) -> None:
     """
     session_id = session["id"]
     metadata = session.get("metadata", {})
-    user_id = uuid.UUID(metadata["user_id"])
-    package_id = uuid.UUID(metadata["package_id"])
     email = metadata.get("email", "")
 
-    logger.info(f"Processing completed checkout {session_id} for user {user_id}")
+    logger.info(f"Processing completed checkout {session_id}")
 
-    # Update purchase status
-    purchase = await database_service.update_purchase_status(
-        db, session_id, "completed"
-    )
+    # The status change and the credit grant are committed together below,
+    # so a crash in between can't mark a purchase completed without credits
+    completed = await database_service.complete_purchase(db, session_id, commit=False)
 
-    if not purchase:
-        logger.error(f"Purchase not found for session {session_id}")
+    if not completed:
+        logger.warning(f"Purchase not found or already completed for session {session_id}")
         return
 
-    # Get package to determine type
-    package = await database_service.get_package_by_id(db, package_id)
-    if not package:
-        logger.error(f"Package {package_id} not found")
-        return
+    user_id, package = completed
 
     if package.package_type == "one_time":
         # Add credits for one-time purchase
         if package.credits:
-            await database_service.add_credits(db, user_id, package.credits)
+            await database_service.add_credits(
+                db, user_id, package.credits, commit=False
+            )
             logger.info(f"Added {package.credits} credits to user {user_id}")
     elif package.package_type == "subscription":
         # Subscription activation handled by subscription.created webhook
         logger.info(f"Subscription checkout completed for user {user_id}, waiting for subscription.created event")
 
+    await db.commit()
+
     # Send order confirmation email
     customer_details = session.get("customer_details", {})
     customer_name = (customer_details.get("name") or "").strip() or "there"
 
-    try:
-        from services.email_service import send_order_confirmation_email
-
-        await send_order_confirmation_email(email, customer_name)
-        logger.info(f"Sent order confirmation email to {email}")
-    except Exception as e:
-        logger.error(f"Failed to send order confirmation email to {email}: {e}")
+    from services.email_service import send_in_background, send_order_confirmation_email
 
+    # Don't hold the event handler open on Brevo
+    send_in_background(send_order_confirmation_email(email, customer_name), email)
 
 
 async def handle_subscription_created(db: AsyncSession, subscription: dict) -> None:
@@ -168,16 +171,15 @@ async def handle_subscription_created(db: AsyncSession, subscription: dict) -> N
 
     logger.info(f"Activating subscription {subscription_id} for {customer_email}")
 
-    # Get user
-    user = await database_service.get_user_by_email(db, customer_email)
-    if not user:
+    # Activate unlimited subscription (expires when Stripe subscription ends)
+    user_id = await database_service.activate_subscription(
+        db, customer_email, expires_at=None
+    )
+    if not user_id:
         logger.error(f"User not found for email {customer_email}")
         return
 
-    # Activate unlimited subscription (expires when Stripe subscription ends)
-    await database_service.activate_subscription(db, user.id, expires_at=None)
-
-    logger.info(f"Activated unlimited subscription for user {user.id}")
+    logger.info(f"Activated unlimited subscription for user {user_id}")
 
 
 async def handle_subscription_deleted(db: AsyncSession, subscription: dict) -> None:
@@ -196,19 +198,16 @@ async def handle_subscription_deleted(db: AsyncSession, subscription: dict) -> N
 
     logger.info(f"Deactivating subscription {subscription_id} for {customer_email}")
 
-    # Get user
-    user = await database_service.get_user_by_email(db, customer_email)
-    if not user:
+    # Deactivate subscription
+    user_id = await database_service.deactivate_subscription(db, customer_email)
+    if not user_id:
         logger.error(f"User not found for email {customer_email}")
         return
 
-    # Deactivate subscription
-    await database_service.deactivate_subscription(db, user.id)
-
-    logger.info(f"Deactivated subscription for user {user.id}")
+    logger.info(f"Deactivated subscription for user {user_id}")
 
 
-def create_stripe_product_and_price(
+async def create_stripe_product_and_price(
     package_name: str,
     package_description: str,
     price_gbp: float,
@@ -230,7 +229,7 @@ def create_stripe_product_and_price(
     """
     try:
         # Create product
-        product = stripe.Product.create(
+        product = await stripe.Product.create_async(
             name=package_name,
             description=package_description,
         )
@@ -239,13 +238,13 @@ def create_stripe_product_and_price(
         price_params = {
             "product": product.id,
             "currency": "gbp",
-            "unit_amount": int(price_gbp * 100),  # Convert to pence
+            "unit_amount": round(price_gbp * 100),  # Convert to pence
         }
 
         if package_type == "subscription":
             price_params["recurring"] = {"interval": "month"}
 
-        price = stripe.Price.create(**price_params)
+        price = await stripe.Price.create_async(**price_params)
 
         logger.info(
             f"Created Stripe product {product.id} and price {price.id} for {package_name}"
@@ -1,4 +1,69 @@
-from models import ParsedFormData, TallyWebhookPayload
+from collections.abc import Callable
+
+from models import ParsedFormData, TallyField, TallyWebhookPayload
+
+
+def extract_consent(payload: TallyWebhookPayload) -> bool:
+    """Return whether the submission's consent checkbox was ticked.
+
+    Scans only for the consent field so submissions without consent can be
+    rejected before the full extraction runs. A missing field counts as no
+    consent.
+    """
+    for field in payload.data.fields:
+        if field.label is not None and "consent" in field.label.lower():
+            return bool(field.value)
+    return False
+
+
+def _parse_name(field: TallyField, data: dict) -> None:
+    data["name"] = field.value
+
+
+def _parse_role(field: TallyField, data: dict) -> None:
+    data["role"] = field.value
+
+
+def _parse_trust(field: TallyField, data: dict) -> None:
+    # Dropdown returns list of IDs; map to text from options
+    selected_id = field.value[0] if isinstance(field.value, list) else field.value
+    data["trust"] = next(
+        (opt["text"] for opt in (field.options or []) if opt["id"] == selected_id),
+        selected_id,
+    )
+
+
+def _parse_person_spec(field: TallyField, data: dict) -> None:
+    file_entry = field.value[0]
+    data["person_spec_url"] = file_entry["url"]
+    data["person_spec_mimetype"] = file_entry["mimeType"]
+
+
+def _parse_cv(field: TallyField, data: dict) -> None:
+    file_entry = field.value[0]
+    data["cv_url"] = file_entry["url"]
+    data["cv_filename"] = file_entry["name"]
+
+
+def _parse_email(field: TallyField, data: dict) -> None:
+    data["email"] = field.value
+
+
+def _parse_consent(field: TallyField, data: dict) -> None:
+    data["consent"] = bool(field.value)
+
+
+# Label substring -> handler, checked in order; the first match wins, so
+# "person specification" must stay ahead of the looser "cv"
+_FIELD_HANDLERS: tuple[tuple[str, Callable[[TallyField, dict], None]], ...] = (
+    ("full name", _parse_name),
+    ("nhs role", _parse_role),
+    ("nhs trust", _parse_trust),
+    ("person specification", _parse_person_spec),
+    ("cv", _parse_cv),
+    ("email", _parse_email),
+    ("consent", _parse_consent),
+)
 
 
 def extract_fields(payload: TallyWebhookPayload) -> ParsedFormData:
@@ -9,6 +74,9 @@ def extract_fields(payload: TallyWebhookPayload) -> ParsedFormData:
     Fields with a null label (e.g. the raw checkbox group) are skipped.
     """
     data: dict = {}
+    # Each handler fires for the first matching field only; the scan stops
+    # once all of them have, skipping the rest of the payload
+    remaining = list(_FIELD_HANDLERS)
 
     for field in payload.data.fields:
         if field.label is None:
@@ -16,35 +84,13 @@ def extract_fields(payload: TallyWebhookPayload) -> ParsedFormData:
 
         label = field.label.strip().lower()
 
-        if "full name" in label:
-            data["name"] = field.value
-
-        elif "nhs role" in label:
-            data["role"] = field.value
-
-        elif "nhs trust" in label:
-            # Dropdown returns list of IDs; map to text from options
-            selected_id = field.value[0] if isinstance(field.value, list) else field.value
-            trust_text = next(
-                (opt["text"] for opt in (field.options or []) if opt["id"] == selected_id),
-                selected_id,
-            )
-            data["trust"] = trust_text
-
-        elif "person specification" in label:
-            file_entry = field.value[0]
-            data["person_spec_url"] = file_entry["url"]
-            data["person_spec_mimetype"] = file_entry["mimeType"]
-
-        elif "cv" in label:
-            file_entry = field.value[0]
-            data["cv_url"] = file_entry["url"]
-            data["cv_filename"] = file_entry["name"]
-
-        elif "email" in label:
-            data["email"] = field.value
+        for i, (token, handler) in enumerate(remaining):
+            if token in label:
+                handler(field, data)
+                del remaining[i]
+                break
 
-        elif "consent" in label:
-            data["consent"] = bool(field.value)
+        if not remaining:
+            break
 
     return ParsedFormData(**data)